@@ -4,12 +4,13 @@ visualize_audio.py
 This file is used to visualize audio data and save the visualization as an image.
 
 Usage:
-    python visualize_audio.py --audio_path <audio_path> --output_dir <output_dir>
+    python visualize_audio.py --audio_path <audio_path> --output_dir <output_dir> [--show]
     
     - audio_path (str): The path to the audio file.
     - output_dir (str): The directory to save the visualization.
     - start_time (float): The start time of the audio segment to visualize.
     - end_time (float): The end time of the audio segment to visualize.
+    - show (bool): Whether to also display the plot in a window.
     
 Example:
     python visualize_audio.py --audio_path /data/audio/sample.wav --output_dir /data/visualization --start_time 0 --end_time 5
@@ -18,12 +19,13 @@ Example:
 import os
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import librosa
 import soundfile as sf
 import argparse
 
 
-def visualize_audio(audio_path: str, output_dir: str, start_time: float = 0, end_time: float = None) -> None:
+def visualize_audio(audio_path: str, output_dir: str, start_time: float = 0, end_time: float = None, show: bool = False) -> None:
     """
     Visualize audio data.
 
@@ -32,6 +34,7 @@ def visualize_audio(audio_path: str, output_dir: str, start_time: float = 0, end
     - output_dir (str): The directory to save the visualization.
     - start_time (float): The start time of the audio segment to visualize.
     - end_time (float): The end time of the audio segment to visualize.
+    - show (bool): Whether to also display the plot in a window.
 
     Returns:
     - None
@@ -51,20 +54,27 @@ def visualize_audio(audio_path: str, output_dir: str, start_time: float = 0, end
     t = t[start_idx:end_idx]
 
     # Plot the audio waveform
-    plt.figure(figsize=(10, 4))
-    plt.plot(t, y, color='grey', linewidth=0.5)
-    plt.xlabel('Time (s)')
-    plt.ylabel('Amplitude')
-    plt.title('Audio Waveform')
-    plt.tight_layout()
+    if show:
+        fig, ax = plt.subplots(figsize=(10, 4))
+    else:
+        # Render off-screen without pyplot so no GUI backend is set up
+        fig = Figure(figsize=(10, 4))
+        ax = fig.subplots()
+    ax.plot(t, y, color='grey', linewidth=0.5)
+    ax.set_xlabel('Time (s)')
+    ax.set_ylabel('Amplitude')
+    ax.set_title('Audio Waveform')
+    fig.tight_layout()
 
     # Save the plot
     output_path = os.path.join(
         output_dir, f'{os.path.basename(audio_path).replace(".wav", "_waveform")}_{int(start_time)}_to_{int(end_time)}s.png')
-    plt.savefig(output_path)
+    fig.savefig(output_path)
     print(f'Audio waveform saved to {output_path}.')
 
-    plt.show()
+    if show:
+        plt.show()
+        plt.close(fig)
 
 
 if __name__ == '__main__':
@@ -77,8 +87,10 @@ if __name__ == '__main__':
                         help='The start time of the audio segment to visualize.')
     parser.add_argument('--end_time', type=float, default=None,
                         help='The end time of the audio segment to visualize.')
+    parser.add_argument('--show', action='store_true',
+                        help='Also display the plot in a window.')
 
     args = parser.parse_args()
 
     visualize_audio(args.audio_path, args.output_dir,
-                    args.start_time, args.end_time)
+                    args.start_time, args.end_time, args.show)
@@ -14,6 +14,9 @@ It requires the following arguments:
 - output_labels_dir: Directory to save predicted label files
 - json_dir: Directory containing JSON transcription files
 - output_annotated_transcript: Path to save annotated transcript
+- jit_compile: (optional) Compile the model with XLA for faster inference
+- threshold: (optional) Decision threshold for the predicted probabilities (default 0.5)
+- optimize_threshold: (optional) Select the threshold from the ROC curve against the actual labels
 
 Usage:
 python evaluate_utterance.py \
@@ -24,7 +27,9 @@ python evaluate_utterance.py \
     --label_info_csv <label_info_csv> \
     --output_labels_dir <output_labels_dir> \
     --json_dir <json_dir> \
-    --output_annotated_transcript <output_annotated_transcript>
+    --output_annotated_transcript <output_annotated_transcript> \
+    [--jit_compile] \
+    [--threshold <threshold> | --optimize_threshold]
     
 Example:
 python evaluate_utterance.py \
@@ -69,6 +74,14 @@ def main():
                         help='Directory containing JSON transcription files')
     parser.add_argument('--output_annotated_transcript', type=str,
                         required=True, help='Path to save annotated transcript')
+    parser.add_argument('--jit_compile', action='store_true',
+                        help='Compile the model with XLA for faster inference')
+    threshold_group = parser.add_mutually_exclusive_group()
+    threshold_group.add_argument('--threshold', type=float, default=0.5,
+                                 help='Decision threshold for the predicted probabilities')
+    threshold_group.add_argument('--optimize_threshold', action='store_true',
+                                 help="Select the threshold maximizing Youden's J on the ROC curve against the actual labels "
+                                      "(optimistic, since it is tuned on the evaluated labels)")
 
     args = parser.parse_args()
 
@@ -81,7 +94,10 @@ def main():
         model_path=args.model_path,
         features_dir=args.features_dir,
         output_labels_dir=args.output_labels_dir,
-        audio_file=args.audio_file
+        audio_file=args.audio_file,
+        jit_compile=args.jit_compile,
+        threshold=None if args.optimize_threshold else args.threshold,
+        labels_dir=args.labels_dir
     )
     predictor.run_predictions()
 
@@ -38,11 +38,15 @@ class LabelComparator:
                 y_true = np.load(actual_label_file)
 
                 # Flatten the arrays for metrics computation
-                y_pred_flat = y_pred.flatten()
-                y_true_flat = y_true.flatten()
+                all_y_pred.append(y_pred.ravel())
+                all_y_true.append(y_true.ravel())
 
-                all_y_pred.extend(y_pred_flat)
-                all_y_true.extend(y_true_flat)
+        if not all_y_true:
+            print("No matching label files found.")
+            return
+
+        all_y_true = np.concatenate(all_y_true)
+        all_y_pred = np.concatenate(all_y_pred)
 
         # Compute classification report
         report = classification_report(all_y_true, all_y_pred, digits=4)
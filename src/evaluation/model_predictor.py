@@ -8,6 +8,7 @@ import os
 import numpy as np
 import tensorflow as tf
 from tensorflow.keras.preprocessing.sequence import pad_sequences
+from sklearn.metrics import roc_curve
 from typing import Dict, Any, Tuple
 
 from src.training.custom_f1_score import CustomF1Score
@@ -33,7 +34,7 @@ def get_custom_objects() -> Dict[str, Any]:
 
 
 class ModelPredictor:
-    def __init__(self, model_path, features_dir, output_labels_dir, audio_file, maxlen=None):
+    def __init__(self, model_path, features_dir, output_labels_dir, audio_file, maxlen=None, jit_compile=False, threshold=0.5, labels_dir=None):
         """
         Initialize the model predictor.
 
@@ -43,11 +44,22 @@ class ModelPredictor:
         - output_labels_dir (str): Directory to save predicted label files.
         - audio_file (str): Path to the audio file (.wav).
         - maxlen (int): Maximum sequence length for padding/truncation.
+        - jit_compile (bool): Whether to compile the prediction function with XLA.
+        - threshold (float): Decision threshold applied to the predicted probabilities. If None, the
+          threshold maximizing Youden's J on the frame-level ROC curve against labels_dir is used.
+        - labels_dir (str): Directory containing actual label files, required when threshold is None.
         """
         self.model_path = model_path
         self.features_dir = features_dir
         self.output_labels_dir = output_labels_dir
         self.audio_file = audio_file
+        self.jit_compile = jit_compile
+        self.threshold = threshold
+        self.labels_dir = labels_dir
+
+        if self.threshold is None and self.labels_dir is None:
+            raise ValueError(
+                "labels_dir is required to select the threshold from the ROC curve")
 
         # Load the model
         self.model = self.load_model()
@@ -62,16 +74,24 @@ class ModelPredictor:
         """
         Load the model from the model file.
 
+        The model is only used for inference, so the optimizer, losses and metrics
+        saved with it are not restored.
+
         Returns:
         - model (tf.keras.Model): Model loaded from the model file.
         """
         print("Loading model...")
         model = tf.keras.models.load_model(
             self.model_path,
-            custom_objects=get_custom_objects()
+            custom_objects=get_custom_objects(),
+            compile=False
         )
         print("Model loaded successfully.")
 
+        # Compile the prediction function to native code with XLA
+        if self.jit_compile:
+            model.jit_compile = True
+
         return model
 
     def get_maxlen(self) -> int:
@@ -128,27 +148,102 @@ class ModelPredictor:
 
         return features_padded, original_length
 
-    def make_predictions(self, features_padded) -> np.ndarray:
+    def predict_scores(self, features_padded) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Make predictions on the features.
+        Compute the predicted probabilities for the features.
 
         Args:
         - features_padded (np.ndarray): Padded or truncated features.
 
         Returns:
-        - frame_predictions_binary (np.ndarray): Binary frame-level predictions.
-        - utt_predictions_binary (np.ndarray): Binary utterance-level predictions.
+        - frame_predictions (np.ndarray): Frame-level probabilities.
+        - utt_predictions (np.ndarray): Utterance-level probabilities.
+        """
+        frame_predictions, utt_predictions = self.model.predict(features_padded)
+
+        return frame_predictions, utt_predictions
+
+    @staticmethod
+    def apply_threshold(predictions, threshold) -> np.ndarray:
+        """
+        Apply a threshold to predicted probabilities.
+
+        Args:
+        - predictions (np.ndarray): Predicted probabilities.
+        - threshold (float or np.ndarray): Decision threshold. An array of thresholds is
+          broadcast over a new last axis, giving one set of binary predictions per threshold.
+
+        Returns:
+        - predictions_binary (np.ndarray): Binary predictions.
+        """
+        threshold = np.asarray(threshold)
+        if threshold.ndim > 0:
+            predictions = predictions[..., np.newaxis]
+
+        return (predictions >= threshold).astype(int)
+
+    def find_best_threshold(self, frame_predictions, original_lengths, feature_file_names) -> float:
         """
-        # Make predictions
-        predictions = self.model.predict(features_padded)
-        frame_predictions, utt_predictions = predictions
+        Find the threshold maximizing Youden's J statistic (TPR - FPR) on the frame-level ROC curve.
+
+        Args:
+        - frame_predictions (np.ndarray): Frame-level probabilities, one row per feature file.
+        - original_lengths (List[int]): Original lengths of the features before padding.
+        - feature_file_names (List[str]): Names of the feature files, in the order of the predictions.
 
-        # Apply threshold to get binary predictions
-        threshold = 0.5
-        frame_predictions_binary = (frame_predictions >= threshold).astype(int)
-        utt_predictions_binary = (utt_predictions >= threshold).astype(int)
+        Returns:
+        - threshold (float): The threshold with the highest Youden's J, or 0.5 if it cannot be computed.
+        """
+        y_true = []
+        y_score = []
 
-        return frame_predictions_binary, utt_predictions_binary
+        for i, feature_file_name in enumerate(feature_file_names):
+            label_file_path = os.path.join(
+                self.labels_dir, feature_file_name.replace('.npy', '_labels.npy'))
+
+            if not os.path.exists(label_file_path):
+                print(
+                    f"Actual label file {label_file_path} does not exist. Skipping.")
+                continue
+
+            labels = np.load(label_file_path)
+            length = min(original_lengths[i],
+                         labels.shape[0], frame_predictions.shape[1])
+            y_true.append(labels[:length].ravel())
+            y_score.append(frame_predictions[i, :length].ravel())
+
+        if not y_true:
+            print("No actual labels found. Using threshold 0.5.")
+            return 0.5
+
+        return self.youden_threshold(np.concatenate(y_true), np.concatenate(y_score))
+
+    @staticmethod
+    def youden_threshold(y_true, y_score) -> float:
+        """
+        Select the threshold maximizing Youden's J statistic (TPR - FPR) on the ROC curve.
+
+        Args:
+        - y_true (np.ndarray): Binary ground-truth labels.
+        - y_score (np.ndarray): Predicted probabilities.
+
+        Returns:
+        - threshold (float): The threshold with the highest Youden's J, or 0.5 if the labels
+          contain a single class or no threshold does better than chance.
+        """
+        if np.unique(y_true).size < 2:
+            print("Actual labels contain a single class. Using threshold 0.5.")
+            return 0.5
+
+        fpr, tpr, thresholds = roc_curve(y_true, y_score)
+        best_index = np.argmax(tpr - fpr)
+
+        # The first ROC threshold is infinite and only wins when no threshold beats chance
+        if not np.isfinite(thresholds[best_index]):
+            print("No threshold does better than chance. Using threshold 0.5.")
+            return 0.5
+
+        return float(thresholds[best_index])
 
     def save_label_file(self, feature_file_name, frame_predictions_binary, original_length) -> str:
         """
@@ -179,31 +274,62 @@ class ModelPredictor:
         """
         Run predictions on feature files corresponding to the given audio file.
 
+        All segments of the audio file are stacked into a single batch so the model
+        is invoked once instead of once per segment.
+
         Saves the frame-level predictions as label files in the output labels directory.
         """
         # Get the base name of the audio file without extension
         audio_base_name = os.path.splitext(
             os.path.basename(self.audio_file))[0]
 
-        # Iterate over all feature files in the features directory
-        for feature_file_name in os.listdir(self.features_dir):
-            if feature_file_name.endswith('.npy') and feature_file_name.startswith(audio_base_name):
-                feature_file_path = os.path.join(
-                    self.features_dir, feature_file_name)
+        # Collect all feature files of the audio file in the features directory
+        feature_file_names = sorted(
+            feature_file_name for feature_file_name in os.listdir(self.features_dir)
+            if feature_file_name.endswith('.npy') and feature_file_name.startswith(audio_base_name)
+        )
+
+        if not feature_file_names:
+            print(f"No feature files found for {audio_base_name}.")
+            return
+
+        features_list = []
+        original_lengths = []
+        for feature_file_name in feature_file_names:
+            feature_file_path = os.path.join(
+                self.features_dir, feature_file_name)
+
+            print(f"Processing {feature_file_name}...")
+
+            # Process features
+            features_padded, original_length = self.process_features(
+                feature_file_path)
+            features_list.append(features_padded[0])
+            original_lengths.append(original_length)
+
+        # Pad to a common length so all segments fit in one batch; padded frames are masked
+        features_batch = pad_sequences(
+            features_list,
+            dtype='float32',
+            padding='post',
+            truncating='post'
+        )
 
-                print(f"Processing {feature_file_name}...")
+        # Compute the probabilities once; threshold selection reuses them
+        frame_predictions, _ = self.predict_scores(features_batch)
 
-                # Process features
-                features_padded, original_length = self.process_features(
-                    feature_file_path)
+        if self.threshold is None:
+            self.threshold = self.find_best_threshold(
+                frame_predictions, original_lengths, feature_file_names)
+            print(f"Selected threshold {self.threshold:.4f} from the ROC curve.")
 
-                # Make predictions
-                frame_preds_bin, utt_preds_bin = self.make_predictions(
-                    features_padded)
+        frame_preds_bin = self.apply_threshold(
+            frame_predictions, self.threshold)
 
-                # Save label file
-                self.save_label_file(
-                    feature_file_name, frame_preds_bin, original_length)
+        # Save label files
+        for i, feature_file_name in enumerate(feature_file_names):
+            self.save_label_file(
+                feature_file_name, frame_preds_bin[i:i + 1], original_lengths[i])
 
     @staticmethod
     def from_args(args) -> 'ModelPredictor':
@@ -220,5 +346,8 @@ class ModelPredictor:
             model_path=args.model_path,
             features_dir=args.features_dir,
             output_labels_dir=args.output_labels_dir,
-            audio_file=args.audio_file
+            audio_file=args.audio_file,
+            jit_compile=getattr(args, 'jit_compile', False),
+            threshold=getattr(args, 'threshold', 0.5),
+            labels_dir=getattr(args, 'labels_dir', None)
         )
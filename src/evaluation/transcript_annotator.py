@@ -55,14 +55,12 @@ class TranscriptAnnotator:
 
     def load_label_info(self):
         # Read the label_info_csv to create a mapping from label files to start and end times
-        label_info = pd.read_csv(self.label_info_csv)
-        for index, row in label_info.iterrows():
-            feature_file = row['feature_file']
-            feature_file_name = os.path.basename(feature_file)
-            label_file_name = feature_file_name.replace('.npy', '_labels.npy')
-            start_time = row['start_time']
-            end_time = row['end_time']
-            self.label_times[label_file_name] = (start_time, end_time)
+        label_info = pd.read_csv(self.label_info_csv, usecols=[
+                                 'feature_file', 'start_time', 'end_time'])
+        label_file_names = label_info['feature_file'].map(os.path.basename).str.replace(
+            '.npy', '_labels.npy', regex=False)
+        self.label_times.update(zip(label_file_names, zip(
+            label_info['start_time'], label_info['end_time'])))
 
     def find_json_file(self):
         # First, try to find the JSON file directly in json_dir
@@ -274,6 +274,26 @@ class LabelEncoder:
         label_info_df.to_csv(label_info_path, index=False)
         print(f"    Label information saved to {label_info_path}")
 
+    @staticmethod
+    def _read_feature_length(feature_file: str) -> int:
+        """
+        Read the number of frames of a feature file from its .npy header, without loading the data.
+
+        Args:
+        - feature_file (str): The path to the audio feature file.
+
+        Returns:
+        - int: The number of frames (first dimension) of the feature array.
+        """
+        with open(feature_file, 'rb') as f:
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, _, _ = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, _, _ = np.lib.format.read_array_header_2_0(f)
+
+        return shape[0]
+
     def _generate_labels_for_single_list(self, list_feature_files: List[str], index: int, file_per_process: int, feature_file_length: int) -> List[Tuple[str, float, float, int]]:
         """
         Generate labels for a list of audio feature files.
@@ -312,8 +332,7 @@ class LabelEncoder:
                     label_file = item['label_file']
                     break
 
-            feature = np.load(feature_file)
-            feature_length = feature.shape[0]
+            feature_length = self._read_feature_length(feature_file)
 
             # Validate length of feature array
             feature_length_check = math.ceil(
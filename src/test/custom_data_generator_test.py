@@ -0,0 +1,61 @@
+"""
+This script tests the truncation of sequences by the custom data generator.
+"""
+
+import sys
+import os
+import unittest
+import numpy as np
+
+try:
+    from src.training.custom_data_generator import CustomDataGenerator
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+    from src.training.custom_data_generator import CustomDataGenerator
+
+
+class TestCustomDataGenerator(unittest.TestCase):
+
+    def setUp(self):
+        # One sample with an event inside maxlen and one whose only event frames are past maxlen
+        self.maxlen = 4
+        self.features = [np.arange(20, dtype=np.float64).reshape(10, 2),
+                         np.ones((6, 2), dtype=np.float64)]
+        self.labels = [np.array([0, 1, 0, 0, 0, 0, 0, 0, 0, 0]),
+                       np.array([0, 0, 0, 0, 1, 1])]
+        self.generator = CustomDataGenerator(
+            self.features, self.labels, batch_size=2, maxlen=self.maxlen)
+
+    def test_pad_sequences_truncates(self):
+        # Test case where a sequence is longer than maxlen
+        padded = self.generator.pad_sequences([self.features[0]], self.maxlen)
+
+        self.assertEqual(padded.shape, (1, self.maxlen, 2))
+        self.assertEqual(padded.dtype, np.float32)
+        np.testing.assert_array_equal(padded[0], self.features[0][:self.maxlen])
+
+    def test_pad_sequences_pads(self):
+        # Test case where a sequence is shorter than maxlen
+        padded = self.generator.pad_sequences([np.ones((2, 2))], self.maxlen)
+
+        self.assertEqual(padded.dtype, np.float32)
+        np.testing.assert_array_equal(padded[0, :2], np.ones((2, 2)))
+        np.testing.assert_array_equal(padded[0, 2:], np.zeros((2, 2)))
+
+    def test_events_past_maxlen_are_ignored(self):
+        # Test case where the only event frames are truncated away
+        self.assertEqual(len(self.generator.labels_with_events), 1)
+        self.assertEqual(len(self.generator.labels_without_events), 1)
+        np.testing.assert_array_equal(
+            self.generator.labels_without_events[0], self.labels[1])
+
+    def test_utterance_labels_match_truncated_frames(self):
+        # Test case where the utterance label follows the truncated frame labels
+        _, (batch_labels_frame, batch_labels_utt) = self.generator[0]
+
+        self.assertEqual(batch_labels_frame.shape, (2, self.maxlen, 1))
+        self.assertEqual(sorted(batch_labels_utt.ravel().tolist()), [0.0, 1.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
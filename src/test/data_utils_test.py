@@ -0,0 +1,77 @@
+"""
+This script tests the helpers used to cache datasets.
+"""
+
+import sys
+import os
+import tempfile
+import unittest
+import joblib
+import numpy as np
+
+try:
+    from src.training.data_utils import get_cache_key, pack_sequences, unpack_sequences
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+    from src.training.data_utils import get_cache_key, pack_sequences, unpack_sequences
+
+
+class TestGetCacheKey(unittest.TestCase):
+
+    def test_cache_key_changes_when_file_is_modified(self):
+        # Test case where a listed .npy file is touched after the key is computed
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_paths = []
+            for name in ('feature.npy', 'label.npy'):
+                file_path = os.path.join(tmp_dir, name)
+                np.save(file_path, np.zeros(3))
+                file_paths.append(file_path)
+
+            key = get_cache_key(file_paths)
+            self.assertEqual(get_cache_key(file_paths), key)
+
+            mtime = os.path.getmtime(file_paths[1])
+            os.utime(file_paths[1], (mtime + 10, mtime + 10))
+            self.assertNotEqual(get_cache_key(file_paths), key)
+
+
+class TestPackSequences(unittest.TestCase):
+
+    def round_trip(self, sequences):
+        # Dump the packed sequences and reload them memory-mapped, as the dataset cache does
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = os.path.join(tmp_dir, 'cache.joblib')
+            joblib.dump(pack_sequences(sequences), cache_path)
+            packed, lengths = joblib.load(cache_path, mmap_mode='r')
+            result = [np.array(sequence) for sequence in unpack_sequences(packed, lengths)]
+            del packed
+        return result
+
+    def test_round_trip_multiple_sequences(self):
+        # Test case with sequences of different lengths
+        sequences = [np.random.rand(length, 3).astype(np.float32) for length in (5, 1, 8)]
+        result = self.round_trip(sequences)
+
+        self.assertEqual(len(result), len(sequences))
+        for original, restored in zip(sequences, result):
+            np.testing.assert_array_equal(original, restored)
+
+    def test_round_trip_single_sequence(self):
+        # Test case with a single sequence
+        sequences = [np.random.rand(4, 2).astype(np.float32)]
+        result = self.round_trip(sequences)
+
+        self.assertEqual(len(result), 1)
+        np.testing.assert_array_equal(sequences[0], result[0])
+
+    def test_empty_sequences(self):
+        # Test case with no sequences
+        packed, lengths = pack_sequences([])
+
+        self.assertEqual(packed.shape[0], 0)
+        self.assertEqual(lengths.shape, (0,))
+        self.assertEqual(unpack_sequences(packed, lengths), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
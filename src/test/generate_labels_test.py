@@ -0,0 +1,42 @@
+"""
+This script tests reading the number of frames from a feature file header.
+"""
+
+import sys
+import os
+import tempfile
+import unittest
+import numpy as np
+
+try:
+    from src.feature_extraction.generate_labels import LabelEncoder
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+    from src.feature_extraction.generate_labels import LabelEncoder
+
+
+class TestReadFeatureLength(unittest.TestCase):
+
+    def read_length(self, array, version):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            feature_file = os.path.join(tmp_dir, 'feature.npy')
+            with open(feature_file, 'wb') as f:
+                np.lib.format.write_array(f, array, version=version)
+            return LabelEncoder._read_feature_length(feature_file)
+
+    def test_read_feature_length_version_1_0(self):
+        # Test case with a version 1.0 .npy header
+        self.assertEqual(self.read_length(np.zeros((17, 40), dtype=np.float32), (1, 0)), 17)
+
+    def test_read_feature_length_version_2_0(self):
+        # Test case with a version 2.0 .npy header
+        self.assertEqual(self.read_length(np.zeros((23, 40), dtype=np.float32), (2, 0)), 23)
+
+    def test_read_feature_length_matches_np_load(self):
+        # Test case where the header length matches the loaded array
+        array = np.random.rand(9, 5)
+        self.assertEqual(self.read_length(array, (1, 0)), array.shape[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+This script tests the threshold helpers of the model predictor.
+"""
+
+import sys
+import os
+import unittest
+import numpy as np
+
+try:
+    from src.evaluation.model_predictor import ModelPredictor
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+    from src.evaluation.model_predictor import ModelPredictor
+
+
+class TestApplyThreshold(unittest.TestCase):
+
+    def test_apply_threshold_scalar(self):
+        # Test case with a single threshold
+        predictions = np.array([[0.2, 0.5, 0.9]])
+        result = ModelPredictor.apply_threshold(predictions, 0.5)
+
+        np.testing.assert_array_equal(result, [[0, 1, 1]])
+
+    def test_apply_threshold_array(self):
+        # Test case with one set of binary predictions per threshold
+        predictions = np.array([[0.2, 0.5, 0.9]])
+        result = ModelPredictor.apply_threshold(predictions, np.array([0.1, 0.6]))
+
+        self.assertEqual(result.shape, (1, 3, 2))
+        np.testing.assert_array_equal(result[..., 0], [[1, 1, 1]])
+        np.testing.assert_array_equal(result[..., 1], [[0, 0, 1]])
+
+
+class TestYoudenThreshold(unittest.TestCase):
+
+    def test_youden_threshold(self):
+        # Test case with overlapping scores
+        y_true = np.array([0, 0, 1, 1])
+        y_score = np.array([0.1, 0.4, 0.35, 0.8])
+
+        self.assertAlmostEqual(ModelPredictor.youden_threshold(y_true, y_score), 0.8)
+
+    def test_youden_threshold_separable(self):
+        # Test case where the scores separate the classes perfectly
+        y_true = np.array([0, 0, 1, 1])
+        y_score = np.array([0.1, 0.3, 0.7, 0.9])
+
+        self.assertAlmostEqual(ModelPredictor.youden_threshold(y_true, y_score), 0.7)
+
+    def test_youden_threshold_infinite(self):
+        # Test case where no threshold beats chance, so the infinite first ROC threshold wins
+        y_true = np.array([0, 1])
+        y_score = np.array([0.9, 0.1])
+
+        self.assertEqual(ModelPredictor.youden_threshold(y_true, y_score), 0.5)
+
+    def test_youden_threshold_single_class(self):
+        # Test case where the labels contain a single class
+        y_true = np.zeros(4)
+        y_score = np.array([0.1, 0.3, 0.7, 0.9])
+
+        self.assertEqual(ModelPredictor.youden_threshold(y_true, y_score), 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+This script tests selecting the best epoch metrics from the training history.
+"""
+
+import sys
+import os
+import unittest
+from types import SimpleNamespace
+
+# model_trainer imports its sibling modules directly, as when run from src/training
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "training"))
+
+try:
+    from src.training.model_trainer import ModelTrainer
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+    from src.training.model_trainer import ModelTrainer
+
+
+class TestGetBestEpochMetrics(unittest.TestCase):
+
+    def make_trainer(self, history, stopped_epoch):
+        # Build a trainer without reading a configuration file
+        trainer = ModelTrainer.__new__(ModelTrainer)
+        trainer.history = SimpleNamespace(history=history)
+        trainer.early_stopping = SimpleNamespace(stopped_epoch=stopped_epoch)
+        return trainer
+
+    def test_best_epoch_metrics(self):
+        # Test case where the validation loss is lowest in the second epoch
+        history = {
+            'loss': [0.9, 0.6, 0.4],
+            'f1_score': [0.2, 0.5, 0.7],
+            'val_loss': [0.8, 0.5, 0.6],
+            'val_f1_score': [0.3, 0.6, 0.55],
+        }
+        results = self.make_trainer(history, stopped_epoch=2).get_best_epoch_metrics()
+
+        self.assertEqual(results, {'loss': 0.5, 'f1_score': 0.6})
+
+    def test_best_epoch_metrics_without_validation(self):
+        # Test case where no validation metrics were recorded
+        history = {'loss': [0.9, 0.6]}
+        results = self.make_trainer(history, stopped_epoch=1).get_best_epoch_metrics()
+
+        self.assertIsNone(results)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -41,7 +41,12 @@ class CustomDataGenerator(tf.keras.utils.Sequence):
         - maxlen (int): The maximum sequence length.
         - enforce_event_split (bool): Whether to enforce a custom event split (e.g., 50% of each batch contains events).
         - event_ratio (float): The desired ratio of samples with events in each batch.
+        - **kwargs: Passed to tf.keras.utils.Sequence (e.g. workers, use_multiprocessing, max_queue_size).
+          Batches are built in parallel when workers > 1. enforce_event_split consumes shared
+          data pools, so it always uses a single worker.
         """
+        if enforce_event_split and kwargs.get('workers', 1) > 1:
+            kwargs['workers'] = 1
         super().__init__(**kwargs)
         self.features = features
         self.labels = labels
@@ -51,12 +56,15 @@ class CustomDataGenerator(tf.keras.utils.Sequence):
         self.event_ratio = event_ratio
 
         # Split data into samples with events and without events
-        self.features_with_events = [f for f, l in zip(
-            features, labels) if np.any(l == 1)]
-        self.labels_with_events = [l for l in labels if np.any(l == 1)]
-        self.features_without_events = [f for f, l in zip(
-            features, labels) if not np.any(l == 1)]
-        self.labels_without_events = [l for l in labels if not np.any(l == 1)]
+        # Only the frames kept after truncation to maxlen count, matching the utterance labels
+        has_events = [bool(np.any(l[:maxlen] == 1)) for l in labels]
+        self.features_with_events = [f for f, e in zip(
+            features, has_events) if e]
+        self.labels_with_events = [l for l, e in zip(labels, has_events) if e]
+        self.features_without_events = [f for f, e in zip(
+            features, has_events) if not e]
+        self.labels_without_events = [
+            l for l, e in zip(labels, has_events) if not e]
 
         self.on_epoch_end()
 
@@ -126,7 +134,7 @@ class CustomDataGenerator(tf.keras.utils.Sequence):
         batch_labels_utt = np.any(
             batch_labels_frame == 1, axis=1).astype(np.float32)
 
-        return np.array(batch_features), (np.array(batch_labels_frame), np.array(batch_labels_utt))
+        return batch_features, (batch_labels_frame, batch_labels_utt)
 
     def on_epoch_end(self):
         """
@@ -176,7 +184,7 @@ class CustomDataGenerator(tf.keras.utils.Sequence):
 
     def pad_sequences(self, sequences: List[np.ndarray], maxlen: int) -> np.ndarray:
         """
-        Pad sequences to a fixed length.
+        Pad sequences to a fixed length. Sequences longer than maxlen are truncated.
 
         Args:
         - sequences (List[np.ndarray]): The sequences to pad.
@@ -188,10 +196,12 @@ class CustomDataGenerator(tf.keras.utils.Sequence):
         sequences = [seq if seq.ndim == 2 else np.expand_dims(
             seq, axis=-1) for seq in sequences]
         feature_dim = sequences[0].shape[1]
-        padded_sequences = np.zeros((len(sequences), maxlen, feature_dim))
+        padded_sequences = np.zeros(
+            (len(sequences), maxlen, feature_dim), dtype=np.float32)
 
         for i, seq in enumerate(sequences):
-            padded_sequences[i, :seq.shape[0], :] = seq
+            length = min(seq.shape[0], maxlen)
+            padded_sequences[i, :length, :] = seq[:length]
 
         return padded_sequences
 
@@ -5,21 +5,33 @@ Utility functions for loading and processing data.
 
 Functions:
 - load_data_from_csv: Load features and labels from a CSV file.
+- load_float32: Load a .npy file as a float32 array.
+- get_available_cpus: Get the number of CPUs the current process may run on.
 - get_max_sequence_length: Calculate the maximum sequence length from features and labels.
+- get_cache_key: Compute a cache key from the paths and modification times of files.
+- pack_sequences: Concatenate variable-length sequences into a single array.
+- unpack_sequences: Split a packed array back into its sequences.
 """
 
 import os
+import hashlib
 import numpy as np
 import pandas as pd
-from typing import Tuple, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, List, Optional
 
 
-def load_data_from_csv(csv_file: str) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+def load_data_from_csv(csv_file: str, max_workers: Optional[int] = None) -> Tuple[List[np.ndarray], List[np.ndarray]]:
     """
     Load features and labels from a CSV file.
 
+    The .npy files are read concurrently with a thread pool since np.load releases
+    the GIL while reading from disk. Arrays are returned as float32, the dtype the
+    model consumes.
+
     Args:
     - csv_file (str): Path to the CSV file containing 'feature_file' and 'label_file' columns.
+    - max_workers (Optional[int]): Number of threads used to read the files (defaults to the number of available CPUs).
 
     Returns:
     - features (List[np.ndarray]): List of feature arrays.
@@ -28,28 +40,54 @@ def load_data_from_csv(csv_file: str) -> Tuple[List[np.ndarray], List[np.ndarray
     if not os.path.exists(csv_file):
         raise FileNotFoundError(f"CSV file not found: {csv_file}")
 
-    data = pd.read_csv(csv_file)
-    features = []
-    labels = []
-
-    for _, row in data.iterrows():
-        feature_path = row['feature_file']
-        label_path = row['label_file']
+    data = pd.read_csv(csv_file, usecols=['feature_file', 'label_file'])
+    feature_paths = data['feature_file'].tolist()
+    label_paths = data['label_file'].tolist()
 
+    for feature_path, label_path in zip(feature_paths, label_paths):
         if not os.path.exists(feature_path):
             raise FileNotFoundError(f"Feature file not found: {feature_path}")
         if not os.path.exists(label_path):
             raise FileNotFoundError(f"Label file not found: {label_path}")
 
-        feature = np.load(feature_path)
-        label = np.load(label_path)
+    if max_workers is None:
+        max_workers = get_available_cpus()
 
-        features.append(feature)
-        labels.append(label)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        features = list(executor.map(load_float32, feature_paths))
+        labels = list(executor.map(load_float32, label_paths))
 
     return features, labels
 
 
+def load_float32(file_path: str) -> np.ndarray:
+    """
+    Load a .npy file as a float32 array.
+
+    Args:
+    - file_path (str): Path to the .npy file.
+
+    Returns:
+    - array (np.ndarray): The loaded array, cast to float32 if stored with another dtype.
+    """
+    return np.load(file_path).astype(np.float32, copy=False)
+
+
+def get_available_cpus() -> int:
+    """
+    Get the number of CPUs the current process may run on.
+
+    On a SLURM node this is the job's allocation rather than every core of the node.
+
+    Returns:
+    - n_cpus (int): Number of available CPUs.
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+
+    return os.cpu_count() or 1
+
+
 def get_max_sequence_length(features: List[np.ndarray], labels: List[np.ndarray]) -> int:
     """
     Calculate the maximum sequence length from features and labels.
@@ -66,3 +104,58 @@ def get_max_sequence_length(features: List[np.ndarray], labels: List[np.ndarray]
         max(label.shape[0] for label in labels)
     )
     return maxlen
+
+
+def get_cache_key(file_paths: List[str]) -> str:
+    """
+    Compute a cache key from the paths and modification times of files.
+
+    Args:
+    - file_paths (List[str]): Paths of the files the cached data is derived from.
+
+    Returns:
+    - key (str): Hex digest identifying the current version of the files.
+    """
+    stamps = [(path, os.path.getmtime(path)) for path in file_paths]
+    key = hashlib.md5(str(stamps).encode('utf-8')).hexdigest()
+    return key
+
+
+def pack_sequences(sequences: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Concatenate variable-length sequences into a single array.
+
+    Args:
+    - sequences (List[np.ndarray]): Sequences with the same trailing dimensions.
+
+    Returns:
+    - packed (np.ndarray): The sequences concatenated along the first axis (empty if there are none).
+    - lengths (np.ndarray): The length of each sequence.
+    """
+    lengths = np.array([sequence.shape[0] for sequence in sequences], dtype=np.int64)
+    if not sequences:
+        return np.empty((0,), dtype=np.float32), lengths
+
+    packed = np.concatenate(sequences, axis=0)
+    return packed, lengths
+
+
+def unpack_sequences(packed: np.ndarray, lengths: np.ndarray) -> List[np.ndarray]:
+    """
+    Split a packed array back into its sequences.
+
+    The sequences are views of the packed array, so no data is copied and a
+    memory-mapped array stays on disk.
+
+    Args:
+    - packed (np.ndarray): The sequences concatenated along the first axis.
+    - lengths (np.ndarray): The length of each sequence.
+
+    Returns:
+    - sequences (List[np.ndarray]): The sequences.
+    """
+    if len(lengths) == 0:
+        return []
+
+    sequences = np.split(packed, np.cumsum(lengths)[:-1])
+    return sequences
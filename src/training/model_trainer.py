@@ -7,6 +7,9 @@ import os
 import json
 import glob
 import re
+import tempfile
+import multiprocessing
+import joblib
 import pandas as pd
 import numpy as np
 import tensorflow as tf
@@ -14,7 +17,7 @@ import tensorflow.keras as keras
 from sklearn.model_selection import KFold
 from typing import List, Dict, Tuple, Any
 
-from data_utils import load_data_from_csv, get_max_sequence_length
+from data_utils import load_data_from_csv, get_available_cpus, get_max_sequence_length, get_cache_key, pack_sequences, unpack_sequences
 from custom_data_generator import CustomDataGenerator
 from model_utils import create_model
 from parse_config import parse_config
@@ -43,19 +46,32 @@ class ModelTrainer:
     - batch_size (int): Batch size for training.
     - k_folds (int): Number of folds for cross-validation.
     - patience (int): Patience for early stopping.
+    - workers (int): Number of worker threads used by the data generators (-1 uses all available cores, unset keeps the default).
+    - parallel_folds (int): Number of cross-validation folds trained at the same time in separate processes (requires cache_dir).
+    - max_sequence_length (int): Upper bound on the padded length of training sequences; longer ones are truncated.
+    - maxlen (int): The maximum sequence length over all sets, used for validation and testing.
+    - train_maxlen (int): The padded length of training batches (maxlen bounded by max_sequence_length).
+    - cache_dir (str): Directory where the loaded datasets are cached (unset or empty disables caching).
     - model (keras.Model): Keras model for training.
     - history (keras.callbacks.History): Training history.
+    - early_stopping (keras.callbacks.EarlyStopping): Early stopping callback of the last training run.
     - train_generator (keras.utils.Sequence): Training data generator.
     - eval_generator (keras.utils.Sequence): Evaluation data generator.
     - test_generator (keras.utils.Sequence): Test data generator.
 
     Methods:
     - __init__: Initialize the ModelTrainer object.
+    - load_datasets: Load the train, eval and test datasets, using the on-disk cache when possible.
+    - load_cached_datasets: Load the datasets from the cache as memory-mapped arrays.
     - initialize_generators: Initialize data generators for training and evaluation.
+    - get_generator_kwargs: Get the keyword arguments passed to every data generator.
     - get_callbacks: Get list of callbacks for training the model.
     - create_model: Create and compile the model.
     - train: Train the model.
     - evaluate: Evaluate the model.
+    - get_best_epoch_metrics: Get the validation metrics of the best epoch from the training history.
+    - get_folds: Get the training and validation indices of each cross-validation fold.
+    - run_fold: Train and evaluate the model on a single cross-validation fold.
     - perform_cross_validation: Perform k-fold cross-validation.
     - save_model_and_history: Save the model and training history to disk.
     - process_cross_validation_metrics: Process cross-validation metrics and save them to a CSV file.
@@ -73,6 +89,7 @@ class ModelTrainer:
         Args:
         - config_paths (List[str]): List of configuration file paths.
         """
+        self.config_paths = config_paths
         self.configs = [parse_config(cp) for cp in config_paths]
         self.config = self.configs[0]
 
@@ -95,42 +112,165 @@ class ModelTrainer:
         self.batch_size = int(self.training_config.get('batch_size', 32))
         self.k_folds = int(self.training_config.get('k_fold', 5))
         self.patience = int(self.training_config.get('patience', 5))
+        self.workers = self.training_config.get('workers')
+        if self.workers is not None:
+            self.workers = int(self.workers)
+            if self.workers == -1:
+                self.workers = get_available_cpus()
+        self.parallel_folds = int(self.training_config.get('parallel_folds', 1))
+        self.max_sequence_length = int(
+            self.training_config.get('max_sequence_length', 0)) or None
+        self.cache_dir = self.config['data'].get('cache_dir', '')
+        if self.parallel_folds > 1 and not self.cache_dir:
+            # Without the cache every fold process would hold its own copy of the datasets
+            raise ValueError(
+                "parallel_folds > 1 requires cache_dir so the fold processes can share the memory-mapped datasets")
 
         # Initialize other attributes
         self.model = None
         self.history = None
+        self.early_stopping = None
         self.train_generator = None
         self.eval_generator = None
         self.test_generator = None
 
-    def initialize_generators(self) -> None:
+    def load_datasets(self) -> Tuple[List[np.ndarray], List[np.ndarray], List[np.ndarray], List[np.ndarray], int]:
         """
-        Initialize data generators for training and evaluation.
+        Load the train, eval and test datasets, using the on-disk cache when possible.
+
+        The cache is keyed by the paths and modification times of the CSV files and of
+        the feature and label files they list, so regenerating a split or the data
+        invalidates it. Cached datasets are memory-mapped rather
+        than read into memory.
+
+        Returns:
+        - all_features (List[np.ndarray]): Features of the train and eval sets.
+        - all_labels (List[np.ndarray]): Labels of the train and eval sets.
+        - test_features (List[np.ndarray]): Features of the test set.
+        - test_labels (List[np.ndarray]): Labels of the test set.
+        - maxlen (int): The maximum sequence length over all sets.
         """
-        # Load datasets
         train_csv = self.config['data']['train_csv']
         eval_csv = self.config['data']['eval_csv']
         test_csv = self.config['data']['test_csv']
 
+        cache_path = None
+        if self.cache_dir:
+            csv_files = [train_csv, eval_csv, test_csv]
+            data_files = [
+                path for csv_file in csv_files
+                for path in pd.read_csv(csv_file, usecols=['feature_file', 'label_file']).values.ravel()
+            ]
+            cache_key = get_cache_key(csv_files + data_files)
+            cache_path = os.path.join(
+                self.cache_dir, f"datasets_{cache_key}.joblib")
+
+            if os.path.exists(cache_path):
+                print(f"Loading cached datasets from {cache_path}")
+                return self.load_cached_datasets(cache_path)
+
         train_features, train_labels = load_data_from_csv(train_csv)
         eval_features, eval_labels = load_data_from_csv(eval_csv)
         test_features, test_labels = load_data_from_csv(test_csv)
 
         # Combine data for cross-validation
-        self.all_features = train_features + eval_features
-        self.all_labels = train_labels + eval_labels
+        all_features = train_features + eval_features
+        all_labels = train_labels + eval_labels
 
         # Calculate maxlen
-        self.maxlen = get_max_sequence_length(
-            self.all_features + test_features,
-            self.all_labels + test_labels
+        maxlen = get_max_sequence_length(
+            all_features + test_features,
+            all_labels + test_labels
         )
 
+        if cache_path is None:
+            return all_features, all_labels, test_features, test_labels, maxlen
+
+        # Pack each set into one array so it is memory-mapped as a single block;
+        # the cache is left uncompressed because joblib cannot memory-map compressed files
+        # Write to a temporary file and move it into place, so jobs sharing the cache
+        # directory never see a partially written cache
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        os.close(fd)
+        try:
+            joblib.dump({
+                'all_features': pack_sequences(all_features),
+                'all_labels': pack_sequences(all_labels),
+                'test_features': pack_sequences(test_features),
+                'test_labels': pack_sequences(test_labels),
+                'maxlen': maxlen,
+            }, tmp_path)
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        print(f"Datasets cached to {cache_path}")
+
+        # Reopen the cache so the arrays loaded above can be released
+        return self.load_cached_datasets(cache_path)
+
+    def load_cached_datasets(self, cache_path: str) -> Tuple[List[np.ndarray], List[np.ndarray], List[np.ndarray], List[np.ndarray], int]:
+        """
+        Load the datasets from the cache as memory-mapped arrays.
+
+        Args:
+        - cache_path (str): Path to the cache file written by load_datasets.
+
+        Returns:
+        - all_features (List[np.ndarray]): Features of the train and eval sets.
+        - all_labels (List[np.ndarray]): Labels of the train and eval sets.
+        - test_features (List[np.ndarray]): Features of the test set.
+        - test_labels (List[np.ndarray]): Labels of the test set.
+        - maxlen (int): The maximum sequence length over all sets.
+        """
+        cache = joblib.load(cache_path, mmap_mode='r')
+
+        all_features = unpack_sequences(*cache['all_features'])
+        all_labels = unpack_sequences(*cache['all_labels'])
+        test_features = unpack_sequences(*cache['test_features'])
+        test_labels = unpack_sequences(*cache['test_labels'])
+
+        return all_features, all_labels, test_features, test_labels, cache['maxlen']
+
+    def initialize_generators(self) -> None:
+        """
+        Initialize data generators for training and evaluation.
+        """
+        # Load datasets
+        (self.all_features, self.all_labels,
+         test_features, test_labels, self.maxlen) = self.load_datasets()
+
+        # Bound the padded length of training batches so a few long outliers do not set
+        # the cost of every batch; validation and test data keep their full length
+        self.train_maxlen = self.maxlen
+        if self.max_sequence_length is not None and self.maxlen > self.max_sequence_length:
+            print(
+                f"Truncating training sequences from {self.maxlen} to {self.max_sequence_length} frames")
+            self.train_maxlen = self.max_sequence_length
+
         # Initialize test data generator
         self.test_generator = CustomDataGenerator(
-            test_features, test_labels, batch_size=self.batch_size, maxlen=self.maxlen
+            test_features, test_labels, batch_size=self.batch_size, maxlen=self.maxlen,
+            **self.get_generator_kwargs()
         )
 
+    def get_generator_kwargs(self) -> Dict[str, Any]:
+        """
+        Get the keyword arguments passed to every data generator.
+
+        workers is only forwarded when it is configured, since only Keras 3's
+        PyDataset accepts it.
+
+        Returns:
+        - generator_kwargs (Dict[str, Any]): Keyword arguments for CustomDataGenerator.
+        """
+        generator_kwargs = {}
+        if self.workers is not None:
+            generator_kwargs['workers'] = self.workers
+
+        return generator_kwargs
+
     def get_callbacks(self, fold_no: int = None) -> List[tf.keras.callbacks.Callback]:
         """
         Get list of callbacks for training the model.
@@ -208,6 +348,11 @@ class ModelTrainer:
         Returns:
         - model (keras.Model): Compiled Keras model.
         """
+        # Accept any number of timesteps when training sequences are truncated, so
+        # validation, testing and inference can run on the full sequences
+        if self.train_maxlen != self.maxlen:
+            input_shape = (None, input_shape[1])
+
         self.model = create_model(
             input_shape,
             num_classes,
@@ -227,6 +372,8 @@ class ModelTrainer:
         - fold_no (int): Fold number for cross-validation.
         """
         callbacks = self.get_callbacks(fold_no)
+        self.early_stopping = next(
+            callback for callback in callbacks if isinstance(callback, tf.keras.callbacks.EarlyStopping))
         initial_epoch = 0
 
         if fold_no is not None:
@@ -276,6 +423,100 @@ class ModelTrainer:
         print(f"Evaluation results for fold {fold_no}: {results}")
         return results
 
+    def get_best_epoch_metrics(self) -> Dict[str, float]:
+        """
+        Get the validation metrics of the best epoch from the training history.
+
+        Early stopping restores the weights of the epoch with the lowest validation loss,
+        so the metrics recorded for that epoch during training are those of the final model.
+        Keras 3 restores them whenever training ends, but tf.keras 2 only does so when early
+        stopping actually stops training; otherwise the model keeps the last epoch's weights.
+
+        Returns:
+        - results (Dict[str, float]): Validation metrics of the best epoch, or None if no epoch was
+          trained or the best weights were not restored.
+        """
+        keras_major_version = int(tf.keras.__version__.split('.')[0])
+        stopped_early = self.early_stopping is not None and self.early_stopping.stopped_epoch > 0
+        if keras_major_version < 3 and not stopped_early:
+            return None
+
+        history = self.history.history if self.history is not None else {}
+        val_losses = history.get('val_loss', [])
+
+        if not val_losses:
+            return None
+
+        best_epoch = int(np.argmin(val_losses))
+        results = {
+            key[len('val_'):]: values[best_epoch]
+            for key, values in history.items() if key.startswith('val_')
+        }
+
+        return results
+
+    def get_folds(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Get the training and validation indices of each cross-validation fold.
+
+        Returns:
+        - folds (List[Tuple[np.ndarray, np.ndarray]]): Training and validation indices per fold.
+        """
+        kfold = KFold(n_splits=self.k_folds, shuffle=True, random_state=42)
+        return list(kfold.split(self.all_features))
+
+    def run_fold(self, fold_no: int, train_idx: np.ndarray, val_idx: np.ndarray) -> Dict[str, float]:
+        """
+        Train and evaluate the model on a single cross-validation fold.
+
+        Args:
+        - fold_no (int): Fold number for cross-validation.
+        - train_idx (np.ndarray): Indices of the training samples of the fold.
+        - val_idx (np.ndarray): Indices of the validation samples of the fold.
+
+        Returns:
+        - results (Dict[str, float]): Evaluation results on the validation samples.
+        """
+        # Split data
+        train_features_fold = [self.all_features[i] for i in train_idx]
+        train_labels_fold = [self.all_labels[i] for i in train_idx]
+        val_features_fold = [self.all_features[i] for i in val_idx]
+        val_labels_fold = [self.all_labels[i] for i in val_idx]
+
+        # Initialize data generators
+        self.train_generator = CustomDataGenerator(
+            train_features_fold, train_labels_fold,
+            batch_size=self.batch_size, maxlen=self.train_maxlen,
+            **self.get_generator_kwargs()
+        )
+        self.eval_generator = CustomDataGenerator(
+            val_features_fold, val_labels_fold,
+            batch_size=self.batch_size, maxlen=self.maxlen,
+            **self.get_generator_kwargs()
+        )
+
+        # Determine input shape and num_classes
+        input_shape = self.train_generator.get_input_shape()
+        num_classes = self.train_generator.get_num_classes()
+
+        # Create model
+        self.create_model(input_shape, num_classes)
+
+        # Train model
+        self.train(fold_no)
+
+        # Reuse the validation metrics computed during training when they match the model's weights
+        results = self.get_best_epoch_metrics()
+        if results is None:
+            results = self.evaluate(self.eval_generator, fold_no)
+        else:
+            print(f"Evaluation results for fold {fold_no}: {results}")
+
+        # Save model and history
+        self.save_model_and_history(fold_no)
+
+        return results
+
     def perform_cross_validation(self) -> None:
         """
         Perform k-fold cross-validation.
@@ -285,60 +526,46 @@ class ModelTrainer:
         it on the validation data. The evaluation results are saved in a list and processed
         after all folds are completed.
 
+        When parallel_folds is greater than 1, the folds are trained in separate processes.
+        Each process memory-maps the datasets from the cache written by initialize_generators
+        rather than receiving them from this process, so parallel folds require cache_dir.
+
         The method also saves the model and training history for each fold.
         """
         self.initialize_fold_log()
         metrics_per_fold = self.load_metrics_per_fold()
-        kfold = KFold(n_splits=self.k_folds, shuffle=True, random_state=42)
-        fold_no = 1
-
-        for train_idx, val_idx in kfold.split(self.all_features):
+        pending_folds = []
+        for fold_no, (train_idx, val_idx) in enumerate(self.get_folds(), start=1):
             status = self.check_fold_status(fold_no)
             if status == 'Completed':
                 print(f"Fold {fold_no} is already completed. Skipping.")
-                fold_no += 1
-                continue
             else:
+                pending_folds.append((fold_no, train_idx, val_idx))
+
+        if self.parallel_folds > 1 and len(pending_folds) > 1:
+            fold_args = [(self.config_paths, fold_no, train_idx, val_idx)
+                         for fold_no, train_idx, val_idx in pending_folds]
+            print(f"Training {len(pending_folds)} folds with {self.parallel_folds} processes")
+
+            context = multiprocessing.get_context('spawn')
+            with context.Pool(processes=min(self.parallel_folds, len(pending_folds))) as pool:
+                # imap keeps the fold order so the metrics line up with their fold numbers
+                for fold_no, results in pool.imap(run_fold_in_process, fold_args):
+                    metrics_per_fold.append(results)
+                    self.save_metrics_per_fold(metrics_per_fold)
+
+                    # Update fold status to 'Completed'
+                    self.update_fold_status(fold_no, 'Completed')
+        else:
+            for fold_no, train_idx, val_idx in pending_folds:
                 print(f"Starting fold {fold_no}/{self.k_folds}")
 
-            # Split data
-            train_features_fold = [self.all_features[i] for i in train_idx]
-            train_labels_fold = [self.all_labels[i] for i in train_idx]
-            val_features_fold = [self.all_features[i] for i in val_idx]
-            val_labels_fold = [self.all_labels[i] for i in val_idx]
-
-            # Initialize data generators
-            self.train_generator = CustomDataGenerator(
-                train_features_fold, train_labels_fold,
-                batch_size=self.batch_size, maxlen=self.maxlen
-            )
-            self.eval_generator = CustomDataGenerator(
-                val_features_fold, val_labels_fold,
-                batch_size=self.batch_size, maxlen=self.maxlen
-            )
-
-            # Determine input shape and num_classes
-            input_shape = self.train_generator.get_input_shape()
-            num_classes = self.train_generator.get_num_classes()
-
-            # Create model
-            self.create_model(input_shape, num_classes)
-
-            # Train model
-            self.train(fold_no)
-
-            # Evaluate model
-            results = self.evaluate(self.eval_generator, fold_no)
-            metrics_per_fold.append(results)
-            self.save_metrics_per_fold(metrics_per_fold)
-
-            # Save model and history
-            self.save_model_and_history(fold_no)
+                results = self.run_fold(fold_no, train_idx, val_idx)
+                metrics_per_fold.append(results)
+                self.save_metrics_per_fold(metrics_per_fold)
 
-            # Update fold status to 'Completed'
-            self.update_fold_status(fold_no, 'Completed')
-
-            fold_no += 1
+                # Update fold status to 'Completed'
+                self.update_fold_status(fold_no, 'Completed')
 
         # After cross-validation, process metrics
         self.process_cross_validation_metrics(metrics_per_fold)
@@ -434,10 +661,22 @@ class ModelTrainer:
     def train_final_model(self) -> None:
         """
         Train the final model on the full training and evaluation data.
+
+        The validation split of the last cross-validation fold is used for early stopping
+        and checkpointing, independently of how the folds were trained.
         """
         # Initialize data generators
         self.train_generator = CustomDataGenerator(
-            self.all_features, self.all_labels, batch_size=self.batch_size, maxlen=self.maxlen
+            self.all_features, self.all_labels, batch_size=self.batch_size, maxlen=self.train_maxlen,
+            **self.get_generator_kwargs()
+        )
+
+        _, val_idx = self.get_folds()[-1]
+        self.eval_generator = CustomDataGenerator(
+            [self.all_features[i] for i in val_idx],
+            [self.all_labels[i] for i in val_idx],
+            batch_size=self.batch_size, maxlen=self.maxlen,
+            **self.get_generator_kwargs()
         )
 
         # Determine input shape and num_classes
@@ -530,3 +769,34 @@ class ModelTrainer:
                     return status
 
         return 'Incomplete'  # Default if not found
+
+
+def run_fold_in_process(fold_args: Tuple[List[str], int, np.ndarray, np.ndarray]) -> Tuple[int, Dict[str, float]]:
+    """
+    Train and evaluate a single cross-validation fold in a worker process.
+
+    Args:
+    - fold_args (Tuple[List[str], int, np.ndarray, np.ndarray]): Configuration file paths,
+      fold number, and training and validation indices of the fold.
+
+    Returns:
+    - fold_no (int): Fold number for cross-validation.
+    - results (Dict[str, float]): Evaluation results on the validation samples.
+    """
+    config_paths, fold_no, train_idx, val_idx = fold_args
+
+    # Let the processes share the GPUs instead of each reserving all of their memory
+    for gpu in tf.config.list_physical_devices('GPU'):
+        tf.config.experimental.set_memory_growth(gpu, True)
+
+    print(f"Starting fold {fold_no} in process {os.getpid()}")
+    trainer = ModelTrainer(config_paths)
+
+    # Share the cores between the fold processes
+    if trainer.workers is not None:
+        trainer.workers = max(1, trainer.workers // trainer.parallel_folds)
+
+    trainer.initialize_generators()
+    results = trainer.run_fold(fold_no, train_idx, val_idx)
+
+    return fold_no, results